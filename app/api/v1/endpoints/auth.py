@@ -7,6 +7,7 @@ from firebase_admin import auth as firebase_auth, credentials, exceptions as fir
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.logger import get_logger
 from app.core.security import create_access_token
 from app.crud import create_user, get_user_by_firebase_uid
 from app.database import init_db  # Ensure database session dependency
@@ -17,6 +18,7 @@ if not firebase_admin._apps:
     firebase_admin.initialize_app(cred)
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 class UserCreate(BaseModel):
     email: str
@@ -54,10 +56,12 @@ async def register_user(user: UserCreate, db: Session = Depends(init_db())):
         return UserResponse(email=db_user.email, full_name=db_user.full_name, role=db_user.role, token=token)
     except firebase_exceptions.AlreadyExistsError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists.")
-    except firebase_exceptions.FirebaseError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Firebase error: {e.message}")
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error registering user: {str(e)}")
+    except firebase_exceptions.FirebaseError:
+        logger.exception("Firebase error registering user")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Firebase error.")
+    except Exception:
+        logger.exception("Error registering user")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error registering user.")
 
 @router.post("/login", response_model=UserResponse)
 async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(init_db())):
@@ -72,7 +76,11 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Sessi
         # Generate JWT token
         token = create_access_token(data={"sub": db_user.email, "role": db_user.role})
         return UserResponse(email=db_user.email, full_name=db_user.full_name, role=db_user.role, token=token)
-    except firebase_exceptions.FirebaseError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Firebase error: {e.message}")
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error logging in user: {str(e)}")
+    except HTTPException:
+        raise
+    except firebase_exceptions.FirebaseError:
+        logger.exception("Firebase error logging in user")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Firebase error.")
+    except Exception:
+        logger.exception("Error logging in user")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error logging in user.")
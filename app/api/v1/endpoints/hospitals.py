@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import List, Optional
+import asyncio
 import requests
 import json
 
 from app.core.config import settings
+from app.core.events import BoundingBox, Subscription, broker
+from app.core.logger import bind_context, get_logger
+from app.core.snapshot import get_snapshot, refresh_snapshot, schedule_snapshot_refresh
 from app.database import init_db
 from app.models import Hospital as HospitalModel
 
@@ -34,8 +39,21 @@ class NearbyHospitalsResponse(BaseModel):
     hospitals: List[Hospital]
 
 
+# Helper function to build a response from an ORM hospital or a snapshot row
+def to_hospital_response(h, distance: Optional[float] = None) -> Hospital:
+    return Hospital(
+        name=h.name,
+        address=h.address,
+        distance=h.distance if distance is None else distance,
+        location=HospitalLocation(lat=h.lat, lng=h.lng),
+        rating=h.rating,
+        reviews=[] if not h.reviews else json.loads(h.reviews),
+    )
+
+
 # Router setup
 router = APIRouter(prefix="/hospitals", tags=["Hospitals"])
+logger = get_logger(__name__)
 
 
 # Helper function to fetch data from TomTom API
@@ -51,6 +69,7 @@ def fetch_hospitals_from_tomtom(lat: float, lon: float, radius: int, limit: int)
 
     response = requests.get(url, params=params)
     if response.status_code != 200:
+        logger.warning("TomTom API request failed", extra={"upstream_status": response.status_code})
         raise HTTPException(
             status_code=response.status_code,
             detail="Failed to fetch nearby hospitals from TomTom API",
@@ -83,8 +102,18 @@ async def get_nearby_hospitals(
 ):
     hospitals_data = fetch_hospitals_from_tomtom(lat, lon, radius, limit)
 
+    # Known hospitals are resolved from the shared snapshot without touching the ORM
+    snapshot = get_snapshot()
     hospitals = []
+    inserted = 0
     for hospital_data in hospitals_data:
+        cached_hospital = snapshot.find(
+            hospital_data["name"], hospital_data["address"], hospital_data["lat"], hospital_data["lng"]
+        ) if snapshot is not None else None
+        if cached_hospital:
+            hospitals.append(cached_hospital)
+            continue
+
         existing_hospital = (
             db.query(HospitalModel)
             .filter(
@@ -110,20 +139,33 @@ async def get_nearby_hospitals(
             db.commit()
             db.refresh(new_hospital)
             hospitals.append(new_hospital)
+            inserted += 1
         else:
             hospitals.append(existing_hospital)
 
+    # Swap in a new snapshot generation so other workers see the ingested rows
+    if inserted:
+        schedule_snapshot_refresh()
+        logger.info("Ingested new hospitals", extra={"hospital_count": inserted})
+
+    return NearbyHospitalsResponse(hospitals=[to_hospital_response(h) for h in hospitals])
+
+
+# Endpoint to fetch nearby hospitals already stored, served from the shared snapshot
+@router.get("/database", response_model=NearbyHospitalsResponse)
+async def get_hospitals_from_database(
+    lat: float,
+    lon: float,
+    radius: int = Query(5000, ge=100, le=50000, description="Search radius in meters"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
+):
+    snapshot = get_snapshot()
+    if snapshot is None:
+        snapshot = await asyncio.to_thread(refresh_snapshot)
     return NearbyHospitalsResponse(
         hospitals=[
-            Hospital(
-                name=h.name,
-                address=h.address,
-                distance=h.distance,
-                location=HospitalLocation(lat=h.lat, lng=h.lng),
-                rating=h.rating,
-                reviews=[] if not h.reviews else json.loads(h.reviews),
-            )
-            for h in hospitals
+            to_hospital_response(h, distance=distance)
+            for distance, h in snapshot.nearby(lat, lon, radius, limit)
         ]
     )
 
@@ -135,6 +177,7 @@ async def add_review(
     review: HospitalReview,
     db: Session = Depends(init_db()),
 ):
+    bind_context(hospital_id=hospital_id)
     hospital = db.query(HospitalModel).filter(HospitalModel.id == hospital_id).first()
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
@@ -149,5 +192,123 @@ async def add_review(
 
     db.commit()
     db.refresh(hospital)
+    # Rebuild before responding so /nearby agrees with the rating pushed to subscribers
+    await asyncio.to_thread(refresh_snapshot)
+
+    # Notify live subscribers of the new review and rating
+    broker.publish({
+        "type": "review",
+        "hospital_id": hospital.id,
+        "lat": hospital.lat,
+        "lng": hospital.lng,
+        "rating": hospital.rating,
+        "review": review.model_dump(),
+    })
 
     return {"message": "Review added successfully", "hospital": hospital}
+
+
+# Helper function to build a bounding box from optional query parameters
+def parse_bounding_box(
+    min_lat: Optional[float], min_lng: Optional[float], max_lat: Optional[float], max_lng: Optional[float]
+) -> Optional[BoundingBox]:
+    bounds = (min_lat, min_lng, max_lat, max_lng)
+    if all(b is None for b in bounds):
+        return None
+    if any(b is None for b in bounds):
+        raise HTTPException(
+            status_code=400,
+            detail="Bounding box requires min_lat, min_lng, max_lat and max_lng",
+        )
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="Bounding box min_lat must not exceed max_lat")
+    # min_lng > max_lng is accepted as a box crossing the antimeridian
+    return bounds
+
+
+# Helper function to wait for the next event, or None when the keep-alive interval elapses
+async def next_event(subscription: Subscription) -> Optional[dict]:
+    try:
+        return await asyncio.wait_for(subscription.queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+
+# Helper function to collect the messages for the next event, preceded by a resync
+# notice when deltas were dropped so the client knows to refetch
+async def next_messages(subscription: Subscription) -> List[Optional[dict]]:
+    event = await next_event(subscription)
+    dropped = subscription.take_dropped()
+    return ([{"type": "resync", "dropped": dropped}] if dropped else []) + [event]
+
+
+# Endpoint to stream live review and rating updates as server-sent events
+@router.get("/stream")
+async def stream_hospital_updates(
+    request: Request,
+    ids: List[int] = Query([], description="Hospital ids to subscribe to"),
+    min_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lng: Optional[float] = None,
+):
+    bbox = parse_bounding_box(min_lat, min_lng, max_lat, max_lng)
+    subscription = broker.subscribe(hospital_ids=set(ids), bbox=bbox)
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                for event in await next_messages(subscription):
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                    else:
+                        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# WebSocket alternative to the server-sent events stream
+@router.websocket("/ws")
+async def websocket_hospital_updates(
+    websocket: WebSocket,
+    ids: List[int] = Query([]),
+    min_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lng: Optional[float] = None,
+):
+    try:
+        bbox = parse_bounding_box(min_lat, min_lng, max_lat, max_lng)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    await websocket.accept()
+    subscription = broker.subscribe(hospital_ids=set(ids), bbox=bbox)
+
+    async def send_events():
+        while True:
+            for event in await next_messages(subscription):
+                await websocket.send_json(event if event is not None else {"type": "keep-alive"})
+
+    async def receive_until_closed():
+        # Client messages are ignored; reading them notices a close frame immediately
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {asyncio.create_task(send_events()), asyncio.create_task(receive_until_closed())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.unsubscribe(subscription)
@@ -1,5 +1,5 @@
 from pydantic import  BaseSettings
-from typing import List, Any
+from typing import List, Any, Dict
 import os
 
 class Settings(BaseSettings):
@@ -21,6 +21,22 @@ class Settings(BaseSettings):
     # Firebase Settings
     FIREBASE_CREDENTIALS_PATH: str = os.getenv("FIREBASE_CREDENTIALS_PATH", "./firebase_credentials.json")
 
+    # Shared memory-mapped snapshot of hospital data, read by every worker
+    HOSPITAL_SNAPSHOT_PATH: str = os.getenv("HOSPITAL_SNAPSHOT_PATH", "./hospitals.snapshot")
+    SNAPSHOT_REFRESH_DELAY_SECONDS: float = float(os.getenv("SNAPSHOT_REFRESH_DELAY_SECONDS", 0.5))  # Coalesces rebuilds
+
+    # Live Event Stream Settings
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", 100))  # Pending events kept per subscriber
+    EVENTS_KEEPALIVE_SECONDS: float = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", 15))
+
+    # Logging Settings
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Fraction of requests logged per route name (the endpoint function); unlisted routes are always logged
+    LOG_SAMPLE_RATES: Dict[str, float] = {
+        "get_nearby_hospitals": 0.1,
+        "get_hospitals_from_database": 0.1,
+    }
+
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[Any] = ["*"]  # Update this in production
 
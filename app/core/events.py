@@ -0,0 +1,83 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+# Bounding box as (min_lat, min_lng, max_lat, max_lng); min_lng > max_lng crosses the antimeridian
+BoundingBox = Tuple[float, float, float, float]
+
+
+@dataclass(eq=False)  # Compared by identity so subscriptions can live in a set
+class Subscription:
+    hospital_ids: Set[int] = field(default_factory=set)
+    bbox: Optional[BoundingBox] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE))
+    dropped: int = 0  # Events discarded because the subscriber fell behind
+    reported_dropped: int = 0  # Portion of `dropped` already announced to the client
+
+    def take_dropped(self) -> int:
+        """
+        Return how many events were dropped since the last call.
+        """
+        count = self.dropped - self.reported_dropped
+        self.reported_dropped = self.dropped
+        return count
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        # A subscription with no filters receives every event
+        if not self.hospital_ids and self.bbox is None:
+            return True
+        if event.get("hospital_id") in self.hospital_ids:
+            return True
+        if self.bbox is not None and event.get("lat") is not None and event.get("lng") is not None:
+            min_lat, min_lng, max_lat, max_lng = self.bbox
+            lng = event["lng"]
+            if min_lng <= max_lng:
+                within_lng = min_lng <= lng <= max_lng
+            else:
+                within_lng = lng >= min_lng or lng <= max_lng
+            return min_lat <= event["lat"] <= max_lat and within_lng
+        return False
+
+
+class EventBroker:
+    """
+    In-process pub/sub broker fanning hospital updates out to live subscribers.
+
+    Each subscriber owns a bounded queue. Publishing never blocks: when a
+    subscriber's queue is full the oldest pending event is dropped so a slow
+    client cannot hold up the others.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, hospital_ids: Optional[Set[int]] = None, bbox: Optional[BoundingBox] = None) -> Subscription:
+        subscription = Subscription(hospital_ids=set(hospital_ids or ()), bbox=bbox)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        delivered = 0
+        for subscription in list(self._subscribers):
+            if not subscription.matches(event):
+                continue
+            if subscription.queue.full():
+                subscription.queue.get_nowait()
+                subscription.dropped += 1
+            subscription.queue.put_nowait(event)
+            delivered += 1
+        return delivered
+
+
+# Singleton broker shared by the endpoints of this worker
+broker = EventBroker()
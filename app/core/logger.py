@@ -0,0 +1,190 @@
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Per-request context, propagated automatically through async code by contextvars
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+log_context_var: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord carries; anything else was passed through `extra`.
+# uvicorn's color_message duplicates the message with ANSI escape codes.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message", "asctime", "request_id", "context", "color_message"
+}
+
+# Client-supplied request ids are echoed into logs and headers, so only short, plain ids are accepted
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+# uvicorn.error propagates to this logger, whose original handlers are restored on shutdown
+UVICORN_LOGGER = "uvicorn"
+
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_uvicorn_handlers: List[logging.Handler] = []
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{settings.APP_NAME.lower()}.{name}")
+
+
+def bind_context(**fields: Any):
+    """
+    Add fields to every log record emitted for the rest of the current request.
+    """
+    log_context_var.set({**log_context_var.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    # Runs in the calling task, before the record is queued, so contextvars are still visible
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.context = log_context_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            payload["request_id"] = record.request_id
+        payload.update(getattr(record, "context", None) or {})
+        payload.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Hand over an unformatted copy; JSON rendering happens on the listener thread
+        return copy.copy(record)
+
+
+def should_sample(route_name: str, status_code: int) -> bool:
+    """
+    Decide whether to log a request, always keeping server errors.
+    """
+    if status_code >= 500:
+        return True
+    rate = settings.LOG_SAMPLE_RATES.get(route_name, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware that assigns each HTTP request an id, exposes it in the
+    X-Request-ID response header and emits a sampled access log.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.logger = get_logger("access")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode("latin-1") for key, value in scope["headers"] if key == b"x-request-id"), ""
+        )
+        if not _REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+        context_token = log_context_var.set({"method": scope["method"], "path": scope["path"]})
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            self.logger.exception("request failed", extra={"duration_ms": self._elapsed_ms(start)})
+            raise
+        else:
+            # Routing stores the matched route in the shared scope; its name is stable across prefixes
+            route_name = getattr(scope.get("route"), "name", None) or scope["path"]
+            if should_sample(route_name, status_code):
+                self.logger.info(
+                    "request completed",
+                    extra={"status_code": status_code, "duration_ms": self._elapsed_ms(start)},
+                )
+        finally:
+            log_context_var.reset(context_token)
+            request_id_var.reset(request_id_token)
+
+    @staticmethod
+    def _elapsed_ms(start: float) -> float:
+        return round((time.perf_counter() - start) * 1000, 2)
+
+
+def setup_logging():
+    """
+    Route application logs through a queue drained by a background thread, so
+    request handlers never block on stdout.
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    # Records are formatted and written on the listener thread, never on the event loop
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = RecordQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+
+    app_logger = logging.getLogger(settings.APP_NAME.lower())
+    app_logger.setLevel(settings.LOG_LEVEL)
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+
+    # Send uvicorn's own logs through the queue too; its access log duplicates RequestLoggingMiddleware
+    uvicorn_logger = logging.getLogger(UVICORN_LOGGER)
+    _uvicorn_handlers[:] = uvicorn_logger.handlers
+    uvicorn_logger.handlers = [_queue_handler]
+    logging.getLogger("uvicorn.access").disabled = True
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    # Flush queued records and stop the background thread
+    global _queue_handler, _listener
+    if _listener is not None:
+        app_logger = logging.getLogger(settings.APP_NAME.lower())
+        app_logger.removeHandler(_queue_handler)
+        app_logger.propagate = True
+        logging.getLogger(UVICORN_LOGGER).handlers = _uvicorn_handlers[:]
+        _uvicorn_handlers.clear()
+        logging.getLogger("uvicorn.access").disabled = False
+        _listener.stop()
+        _queue_handler = _listener = None
@@ -0,0 +1,321 @@
+import asyncio
+import contextlib
+import fcntl
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.database import SessionLocal
+from app.models import Hospital as HospitalModel
+
+logger = get_logger(__name__)
+
+# File layout (little endian, every section aligned to 8 bytes):
+#   header      magic, version, row count, string blob size
+#   ids         int64[n]    sorted ascending
+#   lat, lng    float64[n]
+#   distance    float64[n]  NaN when unknown
+#   rating      float64[n]  NaN when unknown
+#   lat_order   int64[n]    row indices sorted by latitude
+#   name, address, reviews  uint64[2n] (start, end) offsets into the blob
+#   blob        utf-8 strings, each distinct value stored once
+MAGIC = b"HLXSNAP1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+STRING_COLUMNS = ("name", "address", "reviews")
+
+EARTH_RADIUS_METERS = 6371000.0
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+class HospitalRow(NamedTuple):
+    id: int
+    name: str
+    address: str
+    lat: float
+    lng: float
+    distance: Optional[float]
+    rating: Optional[float]
+    reviews: Optional[str]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def build_snapshot(rows: Iterable[Tuple], path: str):
+    """
+    Write hospital rows to a snapshot file and atomically swap it into place.
+
+    Rows are (id, name, address, lat, lng, distance, rating, reviews) tuples.
+    """
+    rows = sorted(rows, key=lambda r: r[0])
+    count = len(rows)
+
+    blob = bytearray()
+    interned = {}
+    string_offsets = {column: [] for column in STRING_COLUMNS}
+    for row in rows:
+        for column, value in zip(STRING_COLUMNS, (row[1], row[2], row[7])):
+            value = value or ""
+            if value not in interned:
+                encoded = value.encode("utf-8")
+                interned[value] = (len(blob), len(blob) + len(encoded))
+                blob.extend(encoded)
+            string_offsets[column].extend(interned[value])
+
+    nan = float("nan")
+    lat_order = sorted(range(count), key=lambda i: rows[i][3])
+    sections = [
+        struct.pack(f"<{count}q", *(r[0] for r in rows)),
+        struct.pack(f"<{count}d", *(r[3] for r in rows)),
+        struct.pack(f"<{count}d", *(r[4] for r in rows)),
+        struct.pack(f"<{count}d", *(nan if r[5] is None else r[5] for r in rows)),
+        struct.pack(f"<{count}d", *(nan if r[6] is None else r[6] for r in rows)),
+        struct.pack(f"<{count}q", *lat_order),
+    ] + [struct.pack(f"<{2 * count}Q", *string_offsets[column]) for column in STRING_COLUMNS]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".hospitals-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, count, len(blob)))
+            for section in sections + [bytes(blob)]:
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_snapshot(db: Session, path: Optional[str] = None):
+    """
+    Rebuild the snapshot from the database.
+
+    Workers serialise on a sidecar lock file and query only once they hold it,
+    so a later writer always sees at least the rows of the one before it and
+    an older copy can never replace a newer generation.
+    """
+    path = path or settings.HOSPITAL_SNAPSHOT_PATH
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file is closed
+        rows = db.query(
+            HospitalModel.id,
+            HospitalModel.name,
+            HospitalModel.address,
+            HospitalModel.lat,
+            HospitalModel.lng,
+            HospitalModel.distance,
+            HospitalModel.rating,
+            HospitalModel.reviews,
+        ).all()
+        build_snapshot(rows, path)
+
+
+class HospitalSnapshot:
+    """
+    Read-only, memory-mapped view of a hospital snapshot file.
+
+    Columns are exposed as memoryviews over the shared mapping, so every
+    worker reads the same pages and nothing is copied until a row is
+    materialised.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.generation = (stat.st_ino, stat.st_mtime_ns)
+
+        magic, version, count, blob_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported hospital snapshot: {path}")
+        self._count = count
+
+        buffer = memoryview(self._mmap)
+        offset = HEADER.size
+
+        def column(fmt: str, length: int) -> memoryview:
+            nonlocal offset
+            offset = _align(offset)
+            view = buffer[offset:offset + length * 8].cast(fmt)
+            offset += length * 8
+            return view
+
+        self._ids = column("q", count)
+        self._lat = column("d", count)
+        self._lng = column("d", count)
+        self._distance = column("d", count)
+        self._rating = column("d", count)
+        self._lat_order = column("q", count)
+        self._strings = {name: column("Q", 2 * count) for name in STRING_COLUMNS}
+        offset = _align(offset)
+        self._blob = buffer[offset:offset + blob_size]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, column: str, index: int) -> str:
+        offsets = self._strings[column]
+        return str(self._blob[offsets[2 * index]:offsets[2 * index + 1]], "utf-8")
+
+    def row(self, index: int) -> HospitalRow:
+        return HospitalRow(
+            id=self._ids[index],
+            name=self._string("name", index),
+            address=self._string("address", index),
+            lat=self._lat[index],
+            lng=self._lng[index],
+            distance=_optional_float(self._distance[index]),
+            rating=_optional_float(self._rating[index]),
+            reviews=self._string("reviews", index) or None,
+        )
+
+    def _lower_bound_lat(self, lat: float) -> int:
+        # Binary search over the latitude index for the first row with latitude >= lat
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._lat[self._lat_order[mid]] < lat:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def get(self, hospital_id: int) -> Optional[HospitalRow]:
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._ids[mid] < hospital_id:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self._count and self._ids[low] == hospital_id:
+            return self.row(low)
+        return None
+
+    def find(self, name: str, address: str, lat: float, lng: float) -> Optional[HospitalRow]:
+        position = self._lower_bound_lat(lat)
+        while position < self._count:
+            index = self._lat_order[position]
+            if self._lat[index] != lat:
+                break
+            if (
+                self._lng[index] == lng
+                and self._string("name", index) == name
+                and self._string("address", index) == address
+            ):
+                return self.row(index)
+            position += 1
+        return None
+
+    def nearby(self, lat: float, lng: float, radius: float, limit: int) -> List[Tuple[float, HospitalRow]]:
+        """
+        Return up to `limit` (distance in meters, row) pairs within `radius`, closest first.
+        """
+        max_lat = lat + radius / METERS_PER_DEGREE_LAT
+        position = self._lower_bound_lat(lat - radius / METERS_PER_DEGREE_LAT)
+        matches = []
+        while position < self._count:
+            index = self._lat_order[position]
+            if self._lat[index] > max_lat:
+                break
+            distance = haversine_distance(lat, lng, self._lat[index], self._lng[index])
+            if distance <= radius:
+                matches.append((distance, index))
+            position += 1
+        matches.sort()
+        return [(distance, self.row(index)) for distance, index in matches[:limit]]
+
+
+_snapshot: Optional[HospitalSnapshot] = None
+
+
+def get_snapshot() -> Optional[HospitalSnapshot]:
+    """
+    Return the current snapshot, remapping it when a newer generation has been swapped in.
+    """
+    global _snapshot
+    try:
+        stat = os.stat(settings.HOSPITAL_SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    if _snapshot is None or _snapshot.generation != (stat.st_ino, stat.st_mtime_ns):
+        _snapshot = HospitalSnapshot(settings.HOSPITAL_SNAPSHOT_PATH)
+    return _snapshot
+
+
+def refresh_snapshot() -> HospitalSnapshot:
+    # Blocking; call from a worker thread when running on the event loop
+    db = SessionLocal()
+    try:
+        write_snapshot(db)
+    finally:
+        db.close()
+    return get_snapshot()
+
+
+_refresh_pending = False
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def schedule_snapshot_refresh():
+    """
+    Request a snapshot rebuild without blocking the event loop.
+
+    Requests arriving while a rebuild is pending or running are coalesced,
+    so a burst of writes costs one or two rebuilds rather than one each.
+    """
+    global _refresh_pending, _refresh_task
+    _refresh_pending = True
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_loop())
+
+
+async def _refresh_loop():
+    global _refresh_pending
+    while _refresh_pending:
+        await asyncio.sleep(settings.SNAPSHOT_REFRESH_DELAY_SECONDS)  # Let a burst of writes accumulate
+        _refresh_pending = False
+        try:
+            await asyncio.to_thread(refresh_snapshot)
+        except Exception:
+            logger.exception("Error refreshing hospital snapshot")
+            _refresh_pending = True  # Retried after the next delay
+
+
+async def flush_snapshot_refresh():
+    """
+    Run any pending rebuild now instead of waiting for the debounce, e.g. on shutdown.
+    """
+    global _refresh_pending
+    if _refresh_task is not None and not _refresh_task.done():
+        _refresh_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _refresh_task
+        _refresh_pending = True  # The cancelled run may not have finished its rebuild
+    if _refresh_pending:
+        _refresh_pending = False
+        await asyncio.to_thread(refresh_snapshot)
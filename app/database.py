@@ -2,6 +2,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models import Base
 from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 DATABASE_URL = settings.DATABASE_URL
 
@@ -15,6 +18,6 @@ def init_db():
     try:
         # Create all tables based on the models
         Base.metadata.create_all(bind=engine)
-        print("Database initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing the database: {e}")
+        logger.info("Database initialized successfully")
+    except Exception:
+        logger.exception("Error initializing the database")
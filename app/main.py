@@ -1,20 +1,35 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.types import Lifespan
 
+from app.core.logger import RequestLoggingMiddleware, get_logger, setup_logging, stop_logging
+from app.core.snapshot import flush_snapshot_refresh, refresh_snapshot, schedule_snapshot_refresh
 from app.database import init_db
 from app.api.v1.endpoints import auth, hospitals, health_records, appointments, telemedicine
 
+setup_logging()
+logger = get_logger(__name__)
+
 # Define the lifespan function
 def lifespan():
     async def start_app():
         # Application startup logic
         init_db()  # Initialize the database
-        print("Application startup completed!")
+        # Rebuild the shared snapshot so rows written while the app was down are visible
+        try:
+            await asyncio.to_thread(refresh_snapshot)
+        except Exception:
+            logger.exception("Error building hospital snapshot at startup")
+            schedule_snapshot_refresh()  # Retried in the background
+        logger.info("Application startup completed")
 
     async def stop_app():
         # Application shutdown logic (optional)
-        print("Application shutdown completed!")
+        await flush_snapshot_refresh()  # Don't lose writes still inside the debounce window
+        logger.info("Application shutdown completed")
+        stop_logging()
 
     return start_app, stop_app
 
@@ -38,6 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request logging middleware: assigns a request id and emits a sampled access log
+app.add_middleware(RequestLoggingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(hospitals.router, prefix="/api/v1/hospitals", tags=["Hospitals"])
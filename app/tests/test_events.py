@@ -0,0 +1,210 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1.endpoints import hospitals
+from app.core.events import EventBroker, broker as app_broker
+from app.database import SessionLocal, Base, engine
+from app.models import Hospital
+
+# Only the hospitals router is mounted, so these tests do not depend on the other routers
+app = FastAPI()
+app.include_router(hospitals.router)
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def test_db():
+    Base.metadata.create_all(bind=engine)  # Create tables
+    db = SessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)  # Drop tables after tests
+
+
+def make_event(hospital_id, lat=13.0674, lng=80.2785, rating=4.5):
+    return {"type": "review", "hospital_id": hospital_id, "lat": lat, "lng": lng, "rating": rating}
+
+
+def test_publish_to_subscribed_hospital_ids():
+    """
+    Test that only subscribers to the hospital id receive the event.
+    """
+    broker = EventBroker()
+    apollo = broker.subscribe(hospital_ids={1})
+    aiims = broker.subscribe(hospital_ids={2})
+
+    assert broker.publish(make_event(1)) == 1
+    assert apollo.queue.get_nowait()["hospital_id"] == 1
+    assert aiims.queue.empty()
+
+
+def test_publish_within_bounding_box():
+    """
+    Test that bounding box subscribers only receive events located inside the box.
+    """
+    broker = EventBroker()
+    chennai = broker.subscribe(bbox=(12.8, 80.0, 13.3, 80.4))
+
+    broker.publish(make_event(1, lat=13.0674, lng=80.2785))
+    broker.publish(make_event(2, lat=25.5957, lng=85.1355))
+
+    assert chennai.queue.qsize() == 1
+    assert chennai.queue.get_nowait()["hospital_id"] == 1
+
+
+def test_unfiltered_subscription_receives_everything():
+    broker = EventBroker()
+    subscription = broker.subscribe()
+
+    broker.publish(make_event(1))
+    broker.publish(make_event(2, lat=25.5957, lng=85.1355))
+
+    assert subscription.queue.qsize() == 2
+
+
+def test_slow_subscriber_drops_oldest_event():
+    """
+    Test that a full subscriber queue discards its oldest event instead of blocking.
+    """
+    broker = EventBroker()
+    subscription = broker.subscribe(hospital_ids={1})
+    capacity = subscription.queue.maxsize
+
+    for rating in range(capacity + 1):
+        broker.publish(make_event(1, rating=rating))
+
+    assert subscription.dropped == 1
+    assert subscription.queue.qsize() == capacity
+    assert subscription.queue.get_nowait()["rating"] == 1
+
+
+def test_unsubscribe_stops_delivery():
+    broker = EventBroker()
+    subscription = broker.subscribe(hospital_ids={1})
+    broker.unsubscribe(subscription)
+
+    assert broker.subscriber_count == 0
+    assert broker.publish(make_event(1)) == 0
+
+
+def test_bounding_box_across_antimeridian():
+    broker = EventBroker()
+    pacific = broker.subscribe(bbox=(-20.0, 170.0, 0.0, -170.0))
+
+    broker.publish(make_event(1, lat=-17.7, lng=178.0))
+    broker.publish(make_event(2, lat=-14.3, lng=-171.0))
+    broker.publish(make_event(3, lat=-10.0, lng=100.0))
+
+    assert [pacific.queue.get_nowait()["hospital_id"] for _ in range(pacific.queue.qsize())] == [1, 2]
+
+
+def test_add_review_publishes_after_commit(test_db, monkeypatch):
+    """
+    Test that add_review publishes the new rating only once it is committed and in the snapshot.
+    """
+    hospital = Hospital(name="Apollo Hospitals", address="Greams Road, Chennai, Tamil Nadu", lat=13.0674, lng=80.2785)
+    test_db.add(hospital)
+    test_db.commit()
+    test_db.refresh(hospital)
+
+    calls = []
+    commit = test_db.commit
+    monkeypatch.setattr(test_db, "commit", lambda: (calls.append("commit"), commit()))
+    monkeypatch.setattr(hospitals, "refresh_snapshot", lambda: calls.append("refresh"))
+    subscription = app_broker.subscribe(hospital_ids={hospital.id})
+    publish = app_broker.publish
+    monkeypatch.setattr(app_broker, "publish", lambda event: calls.append("publish") or publish(event))
+    try:
+        review = hospitals.HospitalReview(reviewer="Asha", comment="Quick and kind staff", rating=4.5)
+        asyncio.run(hospitals.add_review(hospital.id, review, db=test_db))
+    finally:
+        app_broker.unsubscribe(subscription)
+
+    assert calls == ["commit", "refresh", "publish"]
+    event = subscription.queue.get_nowait()
+    assert event["type"] == "review"
+    assert event["hospital_id"] == hospital.id
+    assert event["rating"] == 4.5
+    assert event["review"]["reviewer"] == "Asha"
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def test_stream_frames_events_and_keep_alives(monkeypatch):
+    """
+    Test the server-sent events framing for keep-alives and review events.
+    """
+    event = {"type": "review", "hospital_id": 1, "lat": 13.0674, "lng": 80.2785, "rating": 4.5}
+    scripted = iter([None, event])
+
+    async def fake_next_event(subscription):
+        return next(scripted)
+
+    monkeypatch.setattr(hospitals, "next_event", fake_next_event)
+
+    async def read_stream():
+        response = await hospitals.stream_hospital_updates(ConnectedRequest(), ids=[1])
+        assert response.media_type == "text/event-stream"
+        chunks = [await response.body_iterator.__anext__() for _ in range(2)]
+        await response.body_iterator.aclose()
+        return chunks
+
+    keep_alive, review = asyncio.run(read_stream())
+    assert keep_alive == ": keep-alive\n\n"
+    assert review == f"event: review\ndata: {json.dumps(event)}\n\n"
+    assert app_broker.subscriber_count == 0
+
+
+def test_stream_sends_resync_after_dropped_events(monkeypatch):
+    """
+    Test that a subscriber that fell behind is told to refetch before the next delta.
+    """
+    monkeypatch.setattr(hospitals.settings, "EVENTS_QUEUE_SIZE", 1)
+
+    async def read_stream():
+        response = await hospitals.stream_hospital_updates(ConnectedRequest(), ids=[1])
+        for rating in (3.0, 4.0, 5.0):
+            app_broker.publish(make_event(1, rating=rating))
+        chunks = [await response.body_iterator.__anext__() for _ in range(2)]
+        await response.body_iterator.aclose()
+        return chunks
+
+    resync, review = asyncio.run(read_stream())
+    assert resync == f"event: resync\ndata: {json.dumps({'type': 'resync', 'dropped': 2})}\n\n"
+    assert json.loads(review.split("data: ")[1])["rating"] == 5.0
+
+
+def test_stream_rejects_partial_bounding_box():
+    response = client.get("/hospitals/stream?min_lat=12.8&min_lng=80.0")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Bounding box requires min_lat, min_lng, max_lat and max_lng"
+
+
+def test_stream_rejects_inverted_latitude_range():
+    response = client.get("/hospitals/stream?min_lat=13.3&min_lng=80.0&max_lat=12.8&max_lng=80.4")
+    assert response.status_code == 400
+
+
+def test_websocket_closes_on_partial_bounding_box():
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/hospitals/ws?min_lat=12.8"):
+            pass
+    assert exc_info.value.code == 1008
+
+
+def test_websocket_disconnect_unsubscribes_immediately(monkeypatch):
+    """
+    Test that closing the socket unsubscribes without waiting for the next keep-alive.
+    """
+    monkeypatch.setattr(hospitals.settings, "EVENTS_KEEPALIVE_SECONDS", 3600)
+    with client.websocket_connect("/hospitals/ws?ids=1") as websocket:
+        websocket.send_text("ping")  # Ignored by the server
+    assert app_broker.subscriber_count == 0
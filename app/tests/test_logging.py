@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import logger as app_logger
+from app.core.logger import (
+    ContextFilter, JsonFormatter, RequestLoggingMiddleware, bind_context, request_id_var, should_sample
+)
+
+
+def make_record(message="request completed", **extra):
+    record = logging.makeLogRecord({"name": "healxir.test", "levelname": "INFO", "msg": message, **extra})
+    ContextFilter().filter(record)
+    return record
+
+
+def test_json_record_includes_request_context():
+    """
+    Test that records carry the request id and bound context as JSON fields.
+    """
+    async def handle_request():
+        request_id_var.set("abc123")
+        bind_context(path="/api/v1/hospitals/hospitals/nearby")
+        return make_record(status_code=200)
+
+    payload = json.loads(JsonFormatter().format(asyncio.run(handle_request())))
+    assert payload["message"] == "request completed"
+    assert payload["request_id"] == "abc123"
+    assert payload["path"] == "/api/v1/hospitals/hospitals/nearby"
+    assert payload["status_code"] == 200
+
+
+def test_context_does_not_leak_between_requests():
+    async def handle_request(request_id):
+        request_id_var.set(request_id)
+        await asyncio.sleep(0)
+        return make_record().request_id
+
+    async def handle_concurrently():
+        return await asyncio.gather(handle_request("first"), handle_request("second"))
+
+    assert asyncio.run(handle_concurrently()) == ["first", "second"]
+    assert make_record().request_id is None
+
+
+def test_sampling_keeps_server_errors(monkeypatch):
+    monkeypatch.setattr(app_logger.settings, "LOG_SAMPLE_RATES", {"get_nearby_hospitals": 0.0})
+
+    assert not should_sample("get_nearby_hospitals", 200)
+    assert should_sample("get_nearby_hospitals", 500)
+    assert should_sample("login_user", 200)
+
+
+@pytest.fixture
+def restore_logging():
+    # Tests below stop and restart the global pipeline; put it back as they found it
+    was_running = app_logger._listener is not None
+    yield
+    app_logger.stop_logging()
+    if was_running:
+        app_logger.setup_logging()
+
+
+def test_uvicorn_color_message_is_not_serialised():
+    record = make_record("Started server process", color_message="\x1b[36mStarted server process\x1b[0m")
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert "color_message" not in payload
+    assert payload["message"] == "Started server process"
+
+
+def test_records_written_by_background_listener(capsys, restore_logging):
+    """
+    Test that logs are queued and written out once the listener is stopped.
+    """
+    app_logger.stop_logging()
+    app_logger.setup_logging()
+    try:
+        app_logger.get_logger("test").info("Database initialized successfully")
+    finally:
+        app_logger.stop_logging()
+
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload["message"] == "Database initialized successfully"
+    assert payload["level"] == "INFO"
+
+
+def test_uvicorn_logs_share_the_queue(restore_logging):
+    uvicorn_logger = logging.getLogger("uvicorn")
+    original_handlers = uvicorn_logger.handlers[:]
+    app_logger.stop_logging()
+    app_logger.setup_logging()
+    try:
+        assert uvicorn_logger.handlers == [app_logger._queue_handler]
+        assert logging.getLogger("uvicorn.access").disabled
+    finally:
+        app_logger.stop_logging()
+    assert uvicorn_logger.handlers == original_handlers
+    assert not logging.getLogger("uvicorn.access").disabled
+
+
+@pytest.fixture
+def logged_client(caplog, restore_logging):
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+
+    @app.get("/hospitals/nearby")
+    async def get_nearby_hospitals():
+        return {"hospitals": []}
+
+    @app.get("/hospitals/broken")
+    async def broken():
+        raise RuntimeError("database unavailable")
+
+    app_logger.stop_logging()  # Records propagate to the root logger, where caplog sees them
+    context_filter = ContextFilter()
+    caplog.handler.addFilter(context_filter)
+    yield TestClient(app, raise_server_exceptions=False)
+    caplog.handler.removeFilter(context_filter)
+
+
+def test_middleware_sets_request_id_and_logs_by_route_name(logged_client, caplog, monkeypatch):
+    """
+    Test that the access log carries the request id and samples by route name rather than path.
+    """
+    monkeypatch.setattr(app_logger.settings, "LOG_SAMPLE_RATES", {"get_nearby_hospitals": 1.0})
+    caplog.set_level(logging.INFO)
+
+    response = logged_client.get("/hospitals/nearby", headers={"X-Request-ID": "abc123"})
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "abc123"
+
+    record = next(r for r in caplog.records if r.getMessage() == "request completed")
+    assert record.request_id == "abc123"
+    assert record.status_code == 200
+    assert record.context["path"] == "/hospitals/nearby"
+
+    caplog.clear()
+    monkeypatch.setattr(app_logger.settings, "LOG_SAMPLE_RATES", {"get_nearby_hospitals": 0.0})
+    logged_client.get("/hospitals/nearby")
+    assert not [r for r in caplog.records if r.getMessage() == "request completed"]
+
+
+def test_middleware_logs_unhandled_errors_with_traceback(logged_client, caplog):
+    caplog.set_level(logging.INFO)
+
+    response = logged_client.get("/hospitals/broken")
+    assert response.status_code == 500
+
+    messages = [r.getMessage() for r in caplog.records if r.name == "healxir.access"]
+    assert messages == ["request failed"]
+    failed = next(r for r in caplog.records if r.getMessage() == "request failed")
+    assert failed.levelno == logging.ERROR
+    assert failed.exc_info[0] is RuntimeError
+
+
+@pytest.mark.parametrize("header", ["x" * 65, "abc 123", "abc\r\nInjected: 1", ""])
+def test_middleware_replaces_unsafe_request_ids(logged_client, header):
+    response = logged_client.get("/hospitals/nearby", headers={"X-Request-ID": header})
+
+    request_id = response.headers["X-Request-ID"]
+    assert request_id != header
+    assert len(request_id) == 32
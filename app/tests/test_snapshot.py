@@ -0,0 +1,206 @@
+import asyncio
+import fcntl
+import os
+
+from app.core import snapshot as snapshot_module
+from app.core.snapshot import HospitalSnapshot, build_snapshot
+
+ROWS = [
+    (3, "CMC Vellore", "Bagayam, Vellore, Tamil Nadu", 12.9333, 79.1333, 500.6, 4.8, None),
+    (1, "Apollo Hospitals", "Greams Road, Chennai, Tamil Nadu", 13.0674, 80.2785, 350.2, None, ""),
+    (2, "AIIMS Patna", "Phulwari Sharif, Patna, Bihar", 25.5957, 85.1355, None, 4.2, '[{"rating": 4.2}]'),
+    (4, "Apollo Clinic", "Greams Road, Chennai, Tamil Nadu", 13.0680, 80.2790, None, None, None),
+]
+
+
+def test_lookup_by_id(tmp_path):
+    """
+    Test reading individual hospitals back from the memory-mapped snapshot.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot(ROWS, path)
+    snapshot = HospitalSnapshot(path)
+
+    assert len(snapshot) == 4
+    apollo = snapshot.get(1)
+    assert apollo.name == "Apollo Hospitals"
+    assert apollo.address == "Greams Road, Chennai, Tamil Nadu"
+    assert apollo.lat == 13.0674
+    assert apollo.distance == 350.2
+    assert apollo.rating is None
+    assert apollo.reviews is None
+    assert snapshot.get(2).reviews == '[{"rating": 4.2}]'
+    assert snapshot.get(3).rating == 4.8
+    assert snapshot.get(99) is None
+
+
+def test_find_by_location(tmp_path):
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot(ROWS, path)
+    snapshot = HospitalSnapshot(path)
+
+    found = snapshot.find("CMC Vellore", "Bagayam, Vellore, Tamil Nadu", 12.9333, 79.1333)
+    assert found.id == 3
+    assert snapshot.find("CMC Vellore", "Bagayam, Vellore, Tamil Nadu", 12.9333, 79.0) is None
+
+
+def test_nearby_sorted_by_distance(tmp_path):
+    """
+    Test that nearby only returns hospitals within the radius, closest first.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot(ROWS, path)
+    snapshot = HospitalSnapshot(path)
+
+    results = snapshot.nearby(13.0680, 80.2790, 5000, 10)
+    assert [row.id for _, row in results] == [4, 1]
+    assert results[0][0] == 0.0
+    assert len(snapshot.nearby(13.0680, 80.2790, 5000, 1)) == 1
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot([], path)
+    snapshot = HospitalSnapshot(path)
+
+    assert len(snapshot) == 0
+    assert snapshot.get(1) is None
+    assert snapshot.nearby(13.0674, 80.2785, 5000, 10) == []
+
+
+def test_new_generation_swaps_in_atomically(tmp_path):
+    """
+    Test that rewriting the snapshot replaces the file while existing readers keep their mapping.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot(ROWS[:1], path)
+    old_snapshot = HospitalSnapshot(path)
+
+    build_snapshot(ROWS, path)
+    new_snapshot = HospitalSnapshot(path)
+
+    assert len(old_snapshot) == 1
+    assert old_snapshot.get(3).name == "CMC Vellore"
+    assert len(new_snapshot) == 4
+    assert new_snapshot.generation != old_snapshot.generation
+    assert os.listdir(tmp_path) == ["hospitals.snapshot"]  # No temporary files left behind
+
+
+def test_empty_snapshot_is_still_a_snapshot(tmp_path, monkeypatch):
+    """
+    Test that an empty table yields a cached snapshot rather than forcing a rebuild per request.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot([], path)
+    monkeypatch.setattr(snapshot_module.settings, "HOSPITAL_SNAPSHOT_PATH", path)
+    monkeypatch.setattr(snapshot_module, "_snapshot", None)
+
+    first = snapshot_module.get_snapshot()
+    assert first is not None
+    assert snapshot_module.get_snapshot() is first
+
+
+def test_scheduled_refreshes_are_coalesced(monkeypatch):
+    """
+    Test that a burst of refresh requests results in a single background rebuild.
+    """
+    rebuilds = []
+    monkeypatch.setattr(snapshot_module, "refresh_snapshot", lambda: rebuilds.append(1))
+    monkeypatch.setattr(snapshot_module.settings, "SNAPSHOT_REFRESH_DELAY_SECONDS", 0)
+
+    async def burst():
+        for _ in range(5):
+            snapshot_module.schedule_snapshot_refresh()
+        await snapshot_module._refresh_task
+
+    asyncio.run(burst())
+    assert rebuilds == [1]
+
+
+def test_write_snapshot_queries_under_lock(tmp_path):
+    """
+    Test that rows are queried while the cross-worker lock is held.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    lock_held = []
+
+    class FakeSession:
+        def query(self, *columns):
+            return self
+
+        def all(self):
+            with open(f"{path}.lock", "a") as other_worker:
+                try:
+                    fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    lock_held.append(False)
+                except BlockingIOError:
+                    lock_held.append(True)
+            return ROWS
+
+    snapshot_module.write_snapshot(FakeSession(), path)
+    assert lock_held == [True]
+    assert len(HospitalSnapshot(path)) == 4
+
+
+def test_failed_refresh_is_retried(monkeypatch):
+    """
+    Test that a failed background rebuild is attempted again rather than dropped.
+    """
+    attempts = []
+
+    def flaky_refresh():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(snapshot_module, "refresh_snapshot", flaky_refresh)
+    monkeypatch.setattr(snapshot_module.settings, "SNAPSHOT_REFRESH_DELAY_SECONDS", 0)
+
+    async def refresh():
+        snapshot_module.schedule_snapshot_refresh()
+        await snapshot_module._refresh_task
+
+    asyncio.run(refresh())
+    assert len(attempts) == 2
+
+
+def test_flush_runs_pending_refresh_immediately(monkeypatch):
+    """
+    Test that shutdown does not wait out the debounce or lose a pending rebuild.
+    """
+    rebuilds = []
+    monkeypatch.setattr(snapshot_module, "refresh_snapshot", lambda: rebuilds.append(1))
+    monkeypatch.setattr(snapshot_module.settings, "SNAPSHOT_REFRESH_DELAY_SECONDS", 3600)
+
+    async def shutdown():
+        snapshot_module.schedule_snapshot_refresh()
+        await asyncio.sleep(0)
+        await snapshot_module.flush_snapshot_refresh()
+
+    asyncio.run(asyncio.wait_for(shutdown(), timeout=5))
+    assert rebuilds == [1]
+    assert snapshot_module._refresh_task.done()
+
+
+def test_refresh_picks_up_rows_written_outside_the_app(tmp_path, monkeypatch):
+    """
+    Test that rebuilding replaces a stale snapshot left on disk by an earlier run.
+    """
+    path = str(tmp_path / "hospitals.snapshot")
+    build_snapshot(ROWS[:1], path)
+    monkeypatch.setattr(snapshot_module.settings, "HOSPITAL_SNAPSHOT_PATH", path)
+    monkeypatch.setattr(snapshot_module, "_snapshot", None)
+    assert len(snapshot_module.get_snapshot()) == 1
+
+    class FakeSession:
+        def query(self, *columns):
+            return self
+
+        def all(self):
+            return ROWS
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(snapshot_module, "SessionLocal", FakeSession)
+    assert len(snapshot_module.refresh_snapshot()) == 4